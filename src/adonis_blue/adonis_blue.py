@@ -2,16 +2,16 @@
 import logging
 import os
 
-import butterfly_bot.cogs
 import discord
-from discord.ext import commands
+from butterfly_bot.bot import ButterflyBot
+from butterfly_bot.logging_utils import setup_logging
 from discord_slash import SlashCommand
 from dotenv import load_dotenv
 from version import get_bot_version
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO)
+setup_logging(level=logging.INFO)
 logger = logging.getLogger("adonis_blue")
 
 intents = discord.Intents.default()
@@ -20,13 +20,15 @@ intents.typing = False
 intents.presences = False
 
 description = "butterfly bot alpha"
-adonis_blue = commands.Bot(
-    command_prefix=commands.when_mentioned_or("!"),
+adonis_blue = ButterflyBot(
+    prefixes=("!",),
+    fallback_command="chat",
     description=description,
     intents=intents,
     strip_after_prefix=True,
 )
-slash = SlashCommand(adonis_blue, sync_commands=True, sync_on_cog_reload=True)
+# slash commands are re-registered on reload; syncing them with discord is opt-in via !reload
+slash = SlashCommand(adonis_blue, sync_commands=True, sync_on_cog_reload=False)
 
 
 @adonis_blue.command()
@@ -34,6 +36,5 @@ async def version(ctx):
     await ctx.send(get_bot_version())
 
 
-adonis_blue.add_cog(butterfly_bot.cogs.OpenAIBot(adonis_blue))
-adonis_blue.add_cog(butterfly_bot.cogs.UtilityBot(adonis_blue))
+adonis_blue.load_extension("butterfly_bot.cogs")
 adonis_blue.run(os.getenv("DISCORD_API_KEY"))
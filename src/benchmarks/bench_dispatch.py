@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""measures command dispatch throughput in messages per second on synthetic traffic
+
+compares a plain commands.Bot that reroutes unknown commands to chat from
+on_command_error (the old behaviour) against ButterflyBot's prefilter fast path
+
+usage: PYTHONPATH=lib python benchmarks/bench_dispatch.py [message count]
+"""
+import asyncio
+import gc
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from butterfly_bot.bot import ButterflyBot
+from discord.ext import commands
+
+BOT_ID = 1234567890
+CHATTER = [
+    "lol did you see that",
+    "anyone up for a game tonight?",
+    "brb making tea",
+    "<@987654321> check this out",
+    "that's hilarious",
+]
+COMMANDS = ["!story a dragon learns to knit", f"<@!{BOT_ID}> tarot my week"]
+UNKNOWN = ["!hello how are you", f"<@{BOT_ID}> what's the weather like"]
+
+
+def synthetic_traffic(
+    count: int, command_share: float = 0.05, unknown_share: float = 0.05
+):
+    rng = random.Random(0)
+    for _ in range(count):
+        roll = rng.random()
+        if roll < command_share:
+            content = rng.choice(COMMANDS)
+        elif roll < command_share + unknown_share:
+            content = rng.choice(UNKNOWN)
+        else:
+            content = rng.choice(CHATTER)
+        yield SimpleNamespace(
+            content=content,
+            author=SimpleNamespace(id=42, bot=False),
+            guild=None,
+            _state=None,
+        )
+
+
+def add_noop_commands(bot: commands.Bot):
+    for name in ("chat", "story", "tarot"):
+
+        async def noop(ctx, *words: str):
+            pass
+
+        bot.command(name=name)(noop)
+
+
+def build_baseline_bot() -> commands.Bot:
+    bot = commands.Bot(
+        command_prefix=commands.when_mentioned_or("!"), strip_after_prefix=True
+    )
+
+    async def on_command_error(ctx, exc):
+        if isinstance(exc, commands.CommandNotFound):
+            ctx.message.content = f"{ctx.invoked_with} {ctx.message.content}"
+            ctx.view.index = ctx.view.previous
+            ctx.invoked_with = "chat"
+            ctx.command = bot.all_commands.get("chat")
+            await bot.invoke(ctx)
+
+    bot.add_listener(on_command_error)
+    return bot
+
+
+def build_prefiltered_bot() -> ButterflyBot:
+    return ButterflyBot(
+        prefixes=("!",), fallback_command="chat", strip_after_prefix=True
+    )
+
+
+async def measure(bot: commands.Bot, count: int) -> float:
+    # fresh messages per run, the baseline error handler mutates their content
+    messages = list(synthetic_traffic(count))
+    bot._connection.user = SimpleNamespace(id=BOT_ID, mention=f"<@{BOT_ID}>")
+    add_noop_commands(bot)
+
+    gc.collect()
+    start = time.perf_counter()
+    for message in messages:
+        await bot.process_commands(message)
+    # let error handlers scheduled via dispatch finish
+    pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    await asyncio.gather(*pending)
+    elapsed = time.perf_counter() - start
+
+    return len(messages) / elapsed
+
+
+async def main(count: int):
+    for name, build in (
+        ("baseline", build_baseline_bot),
+        ("prefiltered", build_prefiltered_bot),
+    ):
+        rate = await measure(build(), count)
+        print(f"{name:>12}: {rate:>12,.0f} messages/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -0,0 +1,76 @@
+import logging
+from typing import List, Optional, Sequence
+
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+
+class MessagePrefilter:
+    """decides from the first characters of a message whether it could be a command"""
+
+    def __init__(self, prefixes: Sequence[str]):
+        # keep the given order, it's the order discord.py tries prefixes in
+        self.prefixes = tuple(prefixes)
+        self._first_chars = frozenset(prefix[0] for prefix in self.prefixes)
+
+    def matches(self, content: str) -> bool:
+        return content[:1] in self._first_chars and content.startswith(self.prefixes)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(prefixes: {self.prefixes})"
+
+
+class ButterflyBot(commands.Bot):
+    """commands.Bot with a cheap prefilter in front of command parsing
+
+    messages that can't be commands are dropped before a Context is built, and
+    unknown commands are handed to `fallback_command` instead of raising CommandNotFound
+    """
+
+    def __init__(
+        self,
+        prefixes: Sequence[str] = ("!",),
+        fallback_command: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(command_prefix=commands.when_mentioned_or(*prefixes), **kwargs)
+        self.static_prefixes = tuple(prefixes)
+        self.fallback_command = fallback_command
+        self._prefilter: Optional[MessagePrefilter] = None
+        self._prefix_list: Optional[List[str]] = None
+
+    @property
+    def prefilter(self) -> Optional[MessagePrefilter]:
+        # mention prefixes are only known once we've logged in
+        if self._prefilter is None and self.user is not None:
+            prefixes = commands.when_mentioned(self, None) + list(self.static_prefixes)
+            self._prefilter = MessagePrefilter(prefixes)
+            self._prefix_list = prefixes
+            logger.info(f"built message prefilter: {self._prefilter}")
+        return self._prefilter
+
+    async def get_prefix(self, message):
+        if self.prefilter is not None:
+            return self._prefix_list
+        return await super().get_prefix(message)
+
+    async def process_commands(self, message):
+        if message.author.bot:
+            return
+
+        prefilter = self.prefilter
+        if prefilter is not None and not prefilter.matches(message.content):
+            return
+
+        ctx = await self.get_context(message)
+        if ctx.command is None and ctx.invoked_with and self.fallback_command:
+            self.route_to_fallback(ctx)
+
+        await self.invoke(ctx)
+
+    def route_to_fallback(self, ctx: commands.Context):
+        """rewinds the unknown word so it becomes the fallback command's argument"""
+        ctx.view.index = ctx.view.previous
+        ctx.invoked_with = self.fallback_command
+        ctx.command = self.all_commands.get(self.fallback_command)
@@ -12,8 +12,12 @@ from discord_slash.model import SlashCommandOptionType
 from discord_slash.utils.manage_commands import create_choice, create_option
 
 from .discord_utils import MemberNameConverter
-from .openai_utils import ExchangeManager, complete_with_openai
+from .executor import ConversationBusy, ConversationExecutor, Turn
+from .logging_utils import new_request_id, redact
+from .memory import MemoryManager
+from .openai_utils import ExchangeManager, complete_with_openai, conversation_key
 from .options import DiscordCompletionOptions, StoryOptions
+from .reload import StatefulCog, hot_reload
 from .utils import pretty_time_delta, send_response, send_responses
 
 logger = logging.getLogger(__name__)
@@ -22,11 +26,20 @@ GUILD_IDS = [int(guild_id) for guild_id in os.getenv("GUILD_IDS").split(",")]
 
 DiscordContext = Union[commands.Context, SlashContext, MenuContext, InteractionContext]
 
+BUSY_MESSAGE = "I'm still answering earlier messages here, try again in a moment"
+
 
 async def send_openai_completion(
     options: DiscordCompletionOptions,
 ):
-    logger.info(f"send_openai_completion called with options: {options}")
+    logger.info(
+        "send_openai_completion called",
+        extra={
+            "options": options.__class__.__name__,
+            "prompt": redact(options.prompt),
+            "stops": options.stops,
+        },
+    )
     async with options.ctx.channel.typing():
         response = await complete_with_openai(options.prompt, options.stops)
 
@@ -36,11 +49,32 @@ async def send_openai_completion(
         )
 
 
-class OpenAIBot(commands.Cog):
+class OpenAIBot(StatefulCog):
     def __init__(self, bot: commands.Bot):
+        super().__init__()
         self.bot = bot
         self.exchange_manager = ExchangeManager(max_size=5)
+        self.memory_manager = MemoryManager()
+        self.conversations = ConversationExecutor()
         self.member_name_converter = MemberNameConverter()
+        self.restore_state(bot)
+
+    def export_state(self):
+        return {
+            "exchange_manager": self.exchange_manager,
+            "memory_manager": self.memory_manager,
+            "conversations": self.conversations,
+        }
+
+    def import_state(self, state):
+        self.exchange_manager = state.get("exchange_manager", self.exchange_manager)
+        self.memory_manager = state.get("memory_manager", self.memory_manager)
+        self.conversations = state.get("conversations", self.conversations)
+
+    async def cog_before_invoke(self, ctx: commands.Context):
+        await super().cog_before_invoke(ctx)
+        # correlates every log record emitted while handling this command
+        new_request_id()
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -52,8 +86,7 @@ class OpenAIBot(commands.Cog):
         description="Clear the bot's conversation history",
     )
     async def flush_chat_history_slash(self, ctx: SlashContext):
-        self.exchange_manager.clear(ctx)
-        await ctx.send("I have forgotten everything we discussed.")
+        await self._flush_chat_history(ctx)
 
     @commands.command()
     async def raw_openai(self, ctx: commands.Context, prompt, *stops: str):
@@ -63,8 +96,15 @@ class OpenAIBot(commands.Cog):
 
     @commands.command()
     async def flush_chat_history(self, ctx):
-        self.exchange_manager.clear(ctx)
         await ctx.send("_deprecated: use /flush_chat_history instead going forward")
+        await self._flush_chat_history(ctx)
+
+    async def _flush_chat_history(self, ctx: DiscordContext):
+        # clear right away; chats still in progress here see their turn invalidated
+        # and skip recording their exchange
+        self.conversations.invalidate(conversation_key(ctx))
+        self.exchange_manager.clear(ctx)
+        self.memory_manager.clear(ctx)
         await ctx.send("I have forgotten everything we discussed.")
 
     @cog_slash(
@@ -216,7 +256,18 @@ class OpenAIBot(commands.Cog):
 
     @commands.command()
     async def chat(self, ctx, *words: str):
-        """Sends a prompt to openai and returns the result, keeping 5 exchanges as context"""
+        """Sends a prompt to openai and returns the result, keeping 5 exchanges as context
+
+        older exchanges are recalled from long-term memory when relevant to the new message
+        """
+        try:
+            # turns in a conversation run one at a time in the order they arrived
+            async with self.conversations.turn(conversation_key(ctx)) as turn:
+                await self._chat_turn(ctx, words, turn)
+        except ConversationBusy:
+            await ctx.send(BUSY_MESSAGE)
+
+    async def _chat_turn(self, ctx, words, turn: Turn):
         # sort and concatenate each of the mentioned usernames then hash the resulting string
         # as a key for the exchange cache
         stops = [
@@ -230,7 +281,10 @@ class OpenAIBot(commands.Cog):
             f"Continue the following conversation with your friends:\n\n"
         )
 
-        # append previous exchanges to the prompt
+        # append older exchanges relevant to this message, then the most recent ones
+        recalled = self.memory_manager.recall(ctx, message)
+        if recalled:
+            prompt += "\n".join(recalled) + "\n"
         prompt += self.exchange_manager.get(ctx)
 
         # add new exchange prompt
@@ -244,9 +298,24 @@ class OpenAIBot(commands.Cog):
         )
         await ctx.send(answer)
 
-        # update exchanges for next chat
+        # the history was flushed while we were answering
+        if turn.invalidated:
+            return
+
+        # update exchanges for next chat, moving evicted ones into long-term memory
         new_exchange += f" {answer}\n"
-        self.exchange_manager.append(ctx, new_exchange)
+        evicted = self.exchange_manager.append(ctx, new_exchange)
+        if evicted is not None:
+            self.memory_manager.remember(ctx, evicted)
+
+    @commands.command(hidden=True)
+    @commands.is_owner()
+    async def chat_metrics(self, ctx):
+        """Shows how long chats have waited on earlier turns in their conversation"""
+        await ctx.send(
+            f"```{self.conversations.metrics}, "
+            f"active conversations: {len(self.conversations)}```"
+        )
 
     async def convert_discord_refs_to_names(self, ctx: DiscordContext, words):
         if isinstance(words, str):
@@ -271,10 +340,32 @@ class OpenAIBot(commands.Cog):
             await self.bot.invoke(ctx)
 
 
-class UtilityBot(commands.Cog):
+class UtilityBot(StatefulCog):
     def __init__(self, bot):
+        super().__init__()
         self.bot = bot
         self._start_time = datetime.datetime.now()
+        self.restore_state(bot)
+
+    def export_state(self):
+        return {"start_time": self._start_time}
+
+    def import_state(self, state):
+        self._start_time = state.get("start_time", self._start_time)
+
+    @commands.command(hidden=True)
+    @commands.is_owner()
+    async def reload(
+        self, ctx, sync_slash_commands: bool = False, timeout: float = 30.0
+    ):
+        """Hot reloads the bot's cogs, keeping chat history and running requests"""
+        stragglers = await hot_reload(self.bot, __name__, timeout=timeout)
+        if sync_slash_commands:
+            await self.bot.slash.sync_all_commands()
+        await ctx.send(
+            f"reloaded {__name__}"
+            + (f", {stragglers} requests still finishing" if stragglers else "")
+        )
 
     @cog_slash(
         name="uptime",
@@ -295,3 +386,8 @@ class UtilityBot(commands.Cog):
             f"{pretty_time_delta(int(uptime.total_seconds()))}",
             hidden=(not show_channel),
         )
+
+
+def setup(bot: commands.Bot):
+    bot.add_cog(OpenAIBot(bot))
+    bot.add_cog(UtilityBot(bot))
@@ -0,0 +1,111 @@
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Dict, Hashable
+
+from .logging_utils import sampled
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationBusy(Exception):
+    pass
+
+
+class WaitMetrics:
+    """running totals of how long turns waited for their conversation to be free"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rejected = 0
+
+    def record(self, wait: float):
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def __str__(self):
+        return (
+            f"turns: {self.count}, "
+            f"mean wait: {self.mean:.3f}s, "
+            f"max wait: {self.max:.3f}s, "
+            f"rejected: {self.rejected}"
+        )
+
+
+class Turn:
+    """a running or queued turn, invalidated if its conversation is reset meanwhile"""
+
+    def __init__(self, executor: "ConversationExecutor", key: Hashable):
+        self._executor = executor
+        self._key = key
+        self._generation = executor.generation(key)
+
+    @property
+    def invalidated(self) -> bool:
+        return self._executor.generation(self._key) != self._generation
+
+
+class ConversationExecutor:
+    """runs turns one at a time, in arrival order, within each conversation key
+
+    turns for different keys never wait on each other. at most `max_pending` turns
+    (running or queued) are allowed per key, later ones raise ConversationBusy.
+    invalidate() marks a key's current turns without waiting for them
+    """
+
+    def __init__(self, max_pending: int = 3):
+        self.max_pending = max_pending
+        self.metrics = WaitMetrics()
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._pending: Dict[Hashable, int] = {}
+        self._generations: Dict[Hashable, int] = {}
+
+    @contextlib.asynccontextmanager
+    async def turn(self, key: Hashable):
+        pending = self._pending.get(key, 0)
+        if pending >= self.max_pending:
+            self.metrics.rejected += 1
+            raise ConversationBusy(
+                f"{pending} turns already pending for this conversation"
+            )
+
+        # asyncio.Lock wakes its waiters in FIFO order, which keeps turns ordered
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._pending[key] = pending + 1
+        turn = Turn(self, key)
+        queued_at = time.monotonic()
+        try:
+            async with lock:
+                wait = time.monotonic() - queued_at
+                self.metrics.record(wait)
+                logger.info("conversation turn started", extra=sampled(10, wait=wait))
+                yield turn
+        finally:
+            self._pending[key] -= 1
+            if self._pending[key] == 0:
+                # forget idle conversations so memory is bounded by active ones
+                del self._pending[key]
+                del self._locks[key]
+                self._generations.pop(key, None)
+
+    def invalidate(self, key: Hashable):
+        """invalidates every turn currently running or queued for key"""
+        if key in self._pending:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def generation(self, key: Hashable) -> int:
+        return self._generations.get(key, 0)
+
+    def pending(self, key: Hashable) -> int:
+        return self._pending.get(key, 0)
+
+    def __len__(self):
+        return len(self._pending)
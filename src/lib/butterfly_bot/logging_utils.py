@@ -0,0 +1,138 @@
+import atexit
+import contextvars
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import uuid
+from collections import defaultdict
+from typing import Optional
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+
+# attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", (), None)).keys()
+) | {"message", "asctime", "request_id", "sample_every"}
+
+
+def new_request_id() -> str:
+    """starts a new correlation id for the current task and returns it"""
+    request_id = uuid.uuid4().hex[:12]
+    _request_id.set(request_id)
+    return request_id
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def redact(text: Optional[str], limit: int = 120) -> Optional[str]:
+    """truncates text so log records stay the same size no matter how large the input is"""
+    if text is None:
+        return None
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}...[{len(text) - limit} more chars]"
+
+
+def sampled(every: int, **fields) -> dict:
+    """builds an `extra` dict marking a record to be kept only once per `every` emits"""
+    return {"sample_every": every, **fields}
+
+
+class RequestIdFilter(logging.Filter):
+    """stamps records with the correlation id of the task that emitted them"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """drops all but one in every `sample_every` records from the same call site"""
+
+    def __init__(self):
+        super().__init__()
+        self._counters = defaultdict(itertools.count)
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = getattr(record, "sample_every", 1)
+        if every <= 1:
+            return True
+        with self._lock:
+            seen = next(self._counters[(record.name, record.lineno)])
+        return seen % every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """formats records as single-line JSON objects, including any `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "message": record.getMessage(),
+        }
+        for k, v in vars(record).items():
+            if k not in _RECORD_ATTRS:
+                entry[k] = v
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """queues records with only `msg % args` resolved, leaving exc_info to the formatter
+
+    the stock QueueHandler formats the whole record, traceback included, on the
+    caller's thread
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class StoppableQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() may be called more than once"""
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+def setup_logging(
+    level: int = logging.INFO, handler: Optional[logging.Handler] = None
+) -> StoppableQueueListener:
+    """routes all logging through a queue drained by a background thread
+
+    filtering, request id stamping and `msg % args` happen on the caller's side of the
+    queue, JSON and traceback formatting and I/O happen on the listener thread
+    """
+    if handler is None:
+        handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredFormatQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+
+    listener = StoppableQueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,152 @@
+import logging
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .logging_utils import sampled
+from .openai_utils import _hash_ctx, get_channel_id
+
+logger = logging.getLogger(__name__)
+
+
+class HashingVectorizer:
+    """embeds text as L2-normalized hashed character n-gram counts, fully offline"""
+
+    def __init__(self, n_features: int = 512, ngram_range: Tuple[int, int] = (3, 5)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+
+    def _ngrams(self, text: str):
+        text = f" {' '.join(text.lower().split())} "
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(text) - n + 1):
+                yield text[i : i + n]  # noqa: E203
+
+    def transform(self, text: str) -> np.ndarray:
+        # crc32 rather than hash() so embeddings are stable across processes
+        hashes = np.fromiter(
+            (zlib.crc32(gram.encode("utf-8")) for gram in self._ngrams(text)),
+            dtype=np.uint32,
+        )
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        # use the high bit as a sign so collisions cancel out on average
+        signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+        np.add.at(vector, hashes % self.n_features, signs)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}("
+            f"n_features: {self.n_features}, "
+            f"ngram_range: {self.ngram_range})"
+        )
+
+
+class VectorIndex:
+    """fixed-capacity ring of (text, vector) pairs with brute-force cosine search"""
+
+    def __init__(self, dim: int, capacity: int = 128):
+        self.dim = dim
+        self.capacity = capacity
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._texts: List[Optional[str]] = [None] * capacity
+        self._next = 0
+        self._size = 0
+
+    def add(self, text: str, vector: np.ndarray):
+        self._vectors[self._next] = vector
+        self._texts[self._next] = text
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    @property
+    def _oldest(self) -> int:
+        return self._next if self._size == self.capacity else 0
+
+    def search(
+        self, vector: np.ndarray, k: int = 3, min_score: float = 0.0
+    ) -> List[Tuple[float, int]]:
+        """returns up to k (score, slot) pairs, best first"""
+        if self._size == 0 or k <= 0:
+            return []
+        scores = self._vectors[: self._size] @ vector
+        k = min(k, self._size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), int(i)) for i in top if scores[i] > min_score]
+
+    def text(self, slot: int) -> str:
+        return self._texts[slot]
+
+    def oldest_first(self, slots: Iterable[int]) -> List[int]:
+        """orders slots by when their entries were added"""
+        return sorted(slots, key=lambda slot: (slot - self._oldest) % self.capacity)
+
+    def __iter__(self):
+        """yields stored texts, oldest first"""
+        for i in range(self._size):
+            yield self._texts[(self._oldest + i) % self.capacity]
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}("
+            f"dim: {self.dim}, "
+            f"capacity: {self.capacity}, "
+            f"size: {self._size})"
+        )
+
+
+class MemoryManager:
+    """long-term exchange memory, keyed the same way as ExchangeManager"""
+
+    def __init__(
+        self,
+        capacity: int = 128,
+        top_k: int = 3,
+        min_score: float = 0.1,
+        vectorizer: Optional[HashingVectorizer] = None,
+    ):
+        self.capacity = capacity
+        self.top_k = top_k
+        self.min_score = min_score
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self._indexes = {}
+
+    def get_index(self, ctx) -> VectorIndex:
+        channel_indexes = self._indexes.setdefault(get_channel_id(ctx), {})
+        key = _hash_ctx(ctx)
+        if key not in channel_indexes:
+            channel_indexes[key] = VectorIndex(
+                self.vectorizer.n_features, capacity=self.capacity
+            )
+        return channel_indexes[key]
+
+    def remember(self, ctx, exchange: str):
+        self.get_index(ctx).add(exchange, self.vectorizer.transform(exchange))
+
+    def recall(self, ctx, query: str) -> List[str]:
+        """returns the stored exchanges most similar to query, oldest first"""
+        # only remember() creates indexes, so chats that never evicted anything stay cheap
+        index = self._indexes.get(get_channel_id(ctx), {}).get(_hash_ctx(ctx))
+        if index is None or len(index) == 0:
+            return []
+        hits = index.search(
+            self.vectorizer.transform(query), k=self.top_k, min_score=self.min_score
+        )
+        logger.info("recalled exchanges", extra=sampled(10, recalled=len(hits)))
+        # keep prompt order stable regardless of score ordering, and don't repeat
+        # exchanges that were evicted more than once
+        slots = index.oldest_first(slot for _, slot in hits)
+        return list(dict.fromkeys(index.text(slot) for slot in slots))
+
+    def clear(self, ctx):
+        channel_indexes = self._indexes.get(get_channel_id(ctx), {})
+        channel_indexes.pop(_hash_ctx(ctx), None)
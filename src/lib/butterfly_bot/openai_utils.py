@@ -1,11 +1,14 @@
+import asyncio
 import logging
 import os
 from collections import deque
 from enum import Enum
-from typing import Sequence
+from typing import Optional, Sequence
 
 import openai
 
+from .logging_utils import get_request_id, new_request_id, redact, sampled
+
 logger = logging.getLogger(__name__)
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
@@ -25,10 +28,13 @@ class ExchangeBuffer:
         self.max_size = max_size
         self.joiner = joiner
 
-    def append(self, exchange: str):
+    def append(self, exchange: str) -> Optional[str]:
+        """appends an exchange, returning the one it evicted (if any)"""
+        evicted = None
         if len(self.exchanges) == self.max_size:
-            self.exchanges.popleft()
+            evicted = self.exchanges.popleft()
         self.exchanges.append(exchange)
+        return evicted
 
     def clear(self):
         self.exchanges.clear()
@@ -59,20 +65,32 @@ def _hash_ctx(ctx, exchange_key: ExchangeKey = ExchangeKey.CHANNEL):
     for m in ctx.message.mentions:
         if m.id != ctx.bot.user.id:
             deduped_participants.append(m.id)
-    logger.info(f"deduped_participants: {deduped_participants}")
+    logger.info(
+        "deduped participants",
+        extra=sampled(100, participants=len(deduped_participants)),
+    )
     return frozenset(sorted(deduped_participants))
 
 
+def get_channel_id(ctx):
+    if ctx.message:
+        return ctx.message.channel.id
+    if ctx.channel:
+        return ctx.channel.id
+
+
+def conversation_key(ctx):
+    """identifies the conversation a context belongs to, like ExchangeManager's keys"""
+    return get_channel_id(ctx), _hash_ctx(ctx)
+
+
 class ExchangeManager:
     def __init__(self, max_size: int = 5):
         self.max_size = max_size
         self._exchanges = {}
 
     def get_channel_exchanges(self, ctx):
-        if ctx.message:
-            return self._exchanges.setdefault(ctx.message.channel.id, {})
-        if ctx.channel:
-            return self._exchanges.setdefault(ctx.channel.id, {})
+        return self._exchanges.setdefault(get_channel_id(ctx), {})
 
     def get(self, ctx):
         return str(
@@ -81,10 +99,12 @@ class ExchangeManager:
             )
         )
 
-    def append(self, ctx, exchange: str):
-        self.get_channel_exchanges(ctx).setdefault(
-            _hash_ctx(ctx), ExchangeBuffer(max_size=self.max_size)
-        ).append(exchange)
+    def append(self, ctx, exchange: str) -> Optional[str]:
+        return (
+            self.get_channel_exchanges(ctx)
+            .setdefault(_hash_ctx(ctx), ExchangeBuffer(max_size=self.max_size))
+            .append(exchange)
+        )
 
     def clear(self, ctx):
         key = _hash_ctx(ctx)
@@ -102,12 +122,19 @@ async def complete_with_openai(
     frequency_penalty=0.2,
     presence_penalty=0.6,
 ):
-    logger.info(f"sending the following prompt: {prompt}")
+    if get_request_id() is None:
+        new_request_id()
+    logger.info(
+        "sending openai prompt",
+        extra={"prompt": redact(prompt), "prompt_length": len(prompt)},
+    )
 
     if stops is None or len(stops) == 0:
         stops = ["\n\n"]
 
-    response = openai.Completion.create(
+    # the openai client blocks, so run it off the event loop so other chats can proceed
+    response = await asyncio.to_thread(
+        openai.Completion.create,
         engine="davinci-instruct-beta",
         prompt=prompt,
         temperature=temperature,
@@ -118,15 +145,31 @@ async def complete_with_openai(
         stop=stops,
     )
 
-    logger.info(f"got the following response: {response}")
+    choice = response["choices"][0]
+    logger.info(
+        "got openai response",
+        extra={
+            "response_id": response.get("id"),
+            "finish_reason": choice.get("finish_reason"),
+            "answer": redact(choice["text"]),
+        },
+    )
 
-    if response["choices"][0]["text"]:
-        answer = response["choices"][0]["text"]
+    if choice["text"]:
+        answer = choice["text"]
         if strip_response:
             return f"{answer.strip()}"
         else:
             return f"{answer}"
     else:
-        exc = NoOpenAIResponse(f"openai response didn't include answer:\n\n{response}")
-        logger.exception(exc)
+        exc = NoOpenAIResponse(
+            f"openai response {response.get('id')} didn't include answer"
+        )
+        logger.error(
+            exc,
+            extra={
+                "response_id": response.get("id"),
+                "finish_reason": choice.get("finish_reason"),
+            },
+        )
         raise exc
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Any, Dict, Tuple
+
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+# lives outside the reloaded extension so it survives the swap. only populated while
+# hot_reload is swapping an extension, keyed by (id(bot), cog name)
+_handoff: Dict[Tuple[int, str], Dict[str, Any]] = {}
+
+
+class StatefulCog(commands.Cog):
+    """cog whose in-memory state is handed to its replacement during a hot reload
+
+    subclasses call `super().__init__()` and `self.restore_state(bot)` at the end of
+    their own __init__, and override export_state/import_state
+    """
+
+    def __init__(self):
+        self._in_flight = set()
+
+    def export_state(self) -> Dict[str, Any]:
+        return {}
+
+    def import_state(self, state: Dict[str, Any]):
+        pass
+
+    def restore_state(self, bot: commands.Bot):
+        state = _handoff.get((id(bot), self.qualified_name))
+        if state is not None:
+            self.import_state(state)
+            logger.info(f"{self.qualified_name} restored state: {list(state)}")
+
+    async def cog_before_invoke(self, ctx: commands.Context):
+        self._in_flight.add(asyncio.current_task())
+
+    async def cog_after_invoke(self, ctx: commands.Context):
+        self._in_flight.discard(asyncio.current_task())
+
+    async def drain(self, timeout: float) -> int:
+        """waits for in-flight commands to finish, returning how many still run"""
+        pending = self._in_flight - {asyncio.current_task()}
+        if not pending:
+            return 0
+        _, pending = await asyncio.wait(pending, timeout=timeout)
+        return len(pending)
+
+
+async def hot_reload(bot: commands.Bot, extension: str, timeout: float = 30.0) -> int:
+    """drains the extension's stateful cogs, then reloads it without reconnecting
+
+    state is handed over by reference, so commands still running after `timeout`
+    keep writing into the objects the new cogs use. returns how many were left running
+    """
+    cogs = [
+        cog
+        for cog in bot.cogs.values()
+        if isinstance(cog, StatefulCog) and cog.__module__ == extension
+    ]
+    stragglers = 0
+    for cog in cogs:
+        stragglers += await cog.drain(timeout)
+
+    keys = [(id(bot), cog.qualified_name) for cog in cogs]
+    for key, cog in zip(keys, cogs):
+        _handoff[key] = cog.export_state()
+    try:
+        # if loading the new code fails, discord.py sets the old module up again,
+        # and those cogs pick up the same state
+        bot.reload_extension(extension)
+    finally:
+        for key in keys:
+            _handoff.pop(key, None)
+
+    logger.info(f"reloaded {extension} with {stragglers} commands still in flight")
+    return stragglers
@@ -10,6 +10,7 @@ setup(
     author_email="lina@butterflysky.dev",
     packages=["butterfly_bot"],
     install_requires=[
+        "numpy",
         "openai>=0.10.2",
     ],
 )
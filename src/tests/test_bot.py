@@ -0,0 +1,73 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+
+def build_message(content, author_id=42, bot=False):
+    return SimpleNamespace(
+        content=content,
+        author=SimpleNamespace(id=author_id, bot=bot),
+        guild=None,
+        _state=None,
+    )
+
+
+class MessagePrefilterTest(unittest.TestCase):
+    def test_matches(self):
+        from butterfly_bot.bot import MessagePrefilter
+
+        prefilter = MessagePrefilter(["<@1> ", "<@!1> ", "!"])
+        self.assertTrue(prefilter.matches("!chat hi"))
+        self.assertTrue(prefilter.matches("<@!1> hi"))
+        self.assertFalse(prefilter.matches("<@2> hi"))
+        self.assertFalse(prefilter.matches("hello everyone"))
+        self.assertFalse(prefilter.matches(""))
+
+
+class ButterflyBotTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        from butterfly_bot.bot import ButterflyBot
+
+        self.bot = ButterflyBot(prefixes=("!",), fallback_command="chat")
+        self.bot._connection.user = SimpleNamespace(id=1, mention="<@1>")
+
+        self.calls = []
+
+        @self.bot.command()
+        async def chat(ctx, *words: str):
+            self.calls.append(("chat", words))
+
+        @self.bot.command()
+        async def story(ctx, *words: str):
+            self.calls.append(("story", words))
+
+    async def test_irrelevant_messages_skip_parsing(self):
+        with patch.object(self.bot, "get_context", AsyncMock()) as get_context:
+            await self.bot.process_commands(build_message("just chatting"))
+            get_context.assert_not_called()
+
+    async def test_known_command(self):
+        await self.bot.process_commands(build_message("!story once upon"))
+        self.assertEqual(self.calls, [("story", ("once", "upon"))])
+
+    async def test_unknown_command_routes_to_fallback(self):
+        with patch.object(self.bot, "dispatch") as dispatch:
+            await self.bot.process_commands(build_message("<@!1> hello there"))
+            self.assertNotIn(
+                "command_error", [c.args[0] for c in dispatch.call_args_list]
+            )
+        self.assertEqual(self.calls, [("chat", ("hello", "there"))])
+
+    async def test_get_prefix_is_cached(self):
+        prefix = await self.bot.get_prefix(build_message("!chat"))
+        self.assertEqual(prefix, ["<@1> ", "<@!1> ", "!"])
+        self.assertIs(prefix, await self.bot.get_prefix(build_message("!chat")))
+
+    def test_requires_login_for_prefilter(self):
+        from butterfly_bot.bot import ButterflyBot
+
+        self.assertIsNone(ButterflyBot().prefilter)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+
+
+class ConversationExecutorTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        from butterfly_bot.executor import ConversationExecutor
+
+        self.executor = ConversationExecutor(max_pending=3)
+        self.events = []
+
+    async def run_turn(self, key, name, delay=0.0):
+        async with self.executor.turn(key):
+            self.events.append(f"{name} start")
+            await asyncio.sleep(delay)
+            self.events.append(f"{name} end")
+
+    async def test_same_key_runs_in_arrival_order(self):
+        await asyncio.gather(
+            self.run_turn("a", "first", delay=0.02),
+            self.run_turn("a", "second"),
+            self.run_turn("a", "third"),
+        )
+        self.assertEqual(
+            self.events,
+            [
+                "first start",
+                "first end",
+                "second start",
+                "second end",
+                "third start",
+                "third end",
+            ],
+        )
+        self.assertEqual(self.executor.metrics.count, 3)
+        self.assertGreater(self.executor.metrics.max, 0)
+
+    async def test_different_keys_run_concurrently(self):
+        await asyncio.gather(
+            self.run_turn("a", "a", delay=0.02),
+            self.run_turn("b", "b"),
+        )
+        self.assertEqual(self.events, ["a start", "b start", "b end", "a end"])
+
+    async def test_pending_turns_are_bounded(self):
+        from butterfly_bot.executor import ConversationBusy
+
+        turns = [
+            asyncio.create_task(self.run_turn("a", str(i), delay=0.01))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        self.assertEqual(self.executor.pending("a"), 3)
+
+        with self.assertRaises(ConversationBusy):
+            await self.run_turn("a", "rejected")
+        self.assertEqual(self.executor.metrics.rejected, 1)
+
+        await asyncio.gather(*turns)
+        self.assertEqual(self.executor.pending("a"), 0)
+        self.assertEqual(len(self.executor), 0)
+
+    async def test_invalidate_marks_running_and_queued_turns(self):
+        async def run(results):
+            async with self.executor.turn("a") as turn:
+                await asyncio.sleep(0.01)
+                results.append(turn.invalidated)
+
+        results = []
+        turns = [asyncio.create_task(run(results)) for _ in range(2)]
+        await asyncio.sleep(0)
+        self.executor.invalidate("a")
+        await asyncio.gather(*turns)
+
+        self.assertEqual(results, [True, True])
+        self.assertEqual(self.executor.generation("a"), 0)
+
+        # turns that start after the reset are unaffected
+        await run(results)
+        self.assertEqual(results, [True, True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
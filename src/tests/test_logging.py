@@ -0,0 +1,91 @@
+import asyncio
+import json
+import logging
+import threading
+import unittest
+
+
+class LoggingUtilsTest(unittest.TestCase):
+    def build_record(self, msg="hello", **extra):
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, msg, (), None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_redact(self):
+        from butterfly_bot.logging_utils import redact
+
+        self.assertEqual(redact("short", limit=10), "short")
+        self.assertEqual(redact("x" * 25, limit=10), "xxxxxxxxxx...[15 more chars]")
+        self.assertIsNone(redact(None))
+
+    def test_json_formatter_includes_extras(self):
+        from butterfly_bot.logging_utils import JsonFormatter
+
+        entry = json.loads(
+            JsonFormatter().format(self.build_record(request_id="abc", prompt="foo"))
+        )
+        self.assertEqual(entry["message"], "hello")
+        self.assertEqual(entry["request_id"], "abc")
+        self.assertEqual(entry["prompt"], "foo")
+        self.assertNotIn("lineno", entry)
+
+    def test_sampling_filter(self):
+        from butterfly_bot.logging_utils import SamplingFilter
+
+        sampler = SamplingFilter()
+        kept = [sampler.filter(self.build_record(sample_every=3)) for _ in range(7)]
+        self.assertEqual(kept, [True, False, False, True, False, False, True])
+        self.assertTrue(sampler.filter(self.build_record()))
+
+    def test_request_id_is_per_task(self):
+        from butterfly_bot.logging_utils import RequestIdFilter, new_request_id
+
+        async def handle():
+            request_id = new_request_id()
+            await asyncio.sleep(0)
+            record = self.build_record()
+            RequestIdFilter().filter(record)
+            return request_id, record.request_id
+
+        async def run():
+            return await asyncio.gather(handle(), handle())
+
+        (first, first_seen), (second, second_seen) = asyncio.run(run())
+        self.assertNotEqual(first, second)
+        self.assertEqual(first, first_seen)
+        self.assertEqual(second, second_seen)
+
+    def test_setup_logging_formats_on_listener_thread(self):
+        from butterfly_bot.logging_utils import setup_logging
+
+        class CaptureHandler(logging.Handler):
+            def __init__(self):
+                super().__init__()
+                self.records = []
+
+            def emit(self, record):
+                self.records.append((threading.current_thread(), self.format(record)))
+
+        root = logging.getLogger()
+        self.addCleanup(setattr, root, "handlers", root.handlers)
+        self.addCleanup(root.setLevel, root.level)
+
+        capture = CaptureHandler()
+        listener = setup_logging(handler=capture)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("test").exception("failed %s", "request")
+        listener.stop()
+        # stopping again, as the atexit hook will, is harmless
+        listener.stop()
+
+        [(thread, formatted)] = capture.records
+        entry = json.loads(formatted)
+        self.assertIsNot(thread, threading.main_thread())
+        self.assertEqual(entry["message"], "failed request")
+        self.assertIn("ValueError: boom", entry["exc_info"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import AsyncMock
+
+import numpy as np
+from discord.ext import commands
+
+
+def build_context(channel_id="arbitrary"):
+    ctx: commands.Context = AsyncMock()
+    ctx.message.channel.id = channel_id
+    return ctx
+
+
+class HashingVectorizerTest(unittest.TestCase):
+    def test_transform_is_normalized(self):
+        from butterfly_bot.memory import HashingVectorizer
+
+        vector = HashingVectorizer(n_features=64).transform("hello there friend")
+        self.assertEqual(vector.shape, (64,))
+        self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0, places=5)
+
+    def test_empty_text(self):
+        from butterfly_bot.memory import HashingVectorizer
+
+        vector = HashingVectorizer(n_features=64).transform("")
+        self.assertFalse(vector.any())
+
+
+class VectorIndexTest(unittest.TestCase):
+    def test_capacity_is_bounded(self):
+        from butterfly_bot.memory import HashingVectorizer, VectorIndex
+
+        vectorizer = HashingVectorizer(n_features=64)
+        index = VectorIndex(dim=64, capacity=3)
+        for i in range(5):
+            index.add(f"exchange {i}", vectorizer.transform(f"exchange {i}"))
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(list(index), ["exchange 2", "exchange 3", "exchange 4"])
+
+    def test_search_returns_best_first(self):
+        from butterfly_bot.memory import HashingVectorizer, VectorIndex
+
+        vectorizer = HashingVectorizer()
+        index = VectorIndex(dim=vectorizer.n_features)
+        for text in [
+            "my cat is named whiskers",
+            "the weather is rainy",
+            "pizza is great",
+        ]:
+            index.add(text, vectorizer.transform(text))
+
+        hits = index.search(vectorizer.transform("what is my cat named?"), k=2)
+        self.assertEqual(len(hits), 2)
+        self.assertEqual(index.text(hits[0][1]), "my cat is named whiskers")
+        self.assertGreaterEqual(hits[0][0], hits[1][0])
+
+
+class MemoryManagerTest(unittest.TestCase):
+    def test_recall_is_per_channel(self):
+        from butterfly_bot.memory import MemoryManager
+
+        memory = MemoryManager(top_k=1)
+        ctx = build_context(channel_id="one")
+        memory.remember(ctx, "user: my cat is named whiskers\nbot: cute!\n")
+        memory.remember(ctx, "user: it's rainy today\nbot: stay dry\n")
+
+        self.assertEqual(
+            memory.recall(ctx, "what's my cat's name?"),
+            ["user: my cat is named whiskers\nbot: cute!\n"],
+        )
+        self.assertEqual(memory.recall(build_context(channel_id="two"), "cat"), [])
+        # recalling never allocates an index
+        self.assertNotIn("two", memory._indexes)
+
+        memory.clear(ctx)
+        self.assertEqual(memory.recall(ctx, "what's my cat's name?"), [])
+
+    def test_recall_returns_at_most_top_k(self):
+        from butterfly_bot.memory import MemoryManager
+
+        memory = MemoryManager(top_k=3)
+        ctx = build_context()
+        for _ in range(10):
+            memory.remember(ctx, "alice: hi\nbot: hello!\n")
+        memory.remember(ctx, "alice: hi there, how was your trip?\nbot: great!\n")
+
+        recalled = memory.recall(ctx, "hi")
+        self.assertLessEqual(len(recalled), 3)
+        self.assertIn("alice: hi\nbot: hello!\n", recalled)
+        self.assertEqual(len(recalled), len(set(recalled)))
+
+
+if __name__ == "__main__":
+    unittest.main()
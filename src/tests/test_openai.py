@@ -1,5 +1,7 @@
+import asyncio
 import json
 import os
+import threading
 import unittest
 from unittest.mock import AsyncMock, patch
 
@@ -74,6 +76,85 @@ class OpenAIBotTest(unittest.IsolatedAsyncioTestCase):
         await self.cog.flush_chat_history(self.cog, ctx)
         self.assertEqual(self.cog.exchange_manager.get(ctx), "")
 
+    async def test_chat_recalls_evicted_exchanges(self):
+        """Exchanges pushed out of the recent history are recalled when relevant"""
+        ctx = await build_context(author="test_runner")
+
+        await self.cog.chat(self.cog, ctx, "my", "cat", "is", "named", "whiskers")
+        for i in range(5):
+            await self.cog.chat(self.cog, ctx, f"filler {i}")
+
+        evicted = "test_runner: my cat is named whiskers\nbot: bar\n"
+        self.assertNotIn(evicted, self.cog.exchange_manager.get(ctx))
+
+        await self.cog.chat(self.cog, ctx, "what", "is", "my", "cat", "named?")
+        self.assertIn(evicted, self.mocked_create.call_args.kwargs["prompt"])
+
+    async def test_concurrent_chats_keep_request_order(self):
+        """Concurrent chats in a conversation see each other's history in order"""
+        ctx = await build_context(author="test_runner")
+
+        await asyncio.gather(
+            self.cog.chat(self.cog, ctx, "first"),
+            self.cog.chat(self.cog, ctx, "second"),
+        )
+        self.assertEqual(
+            self.cog.exchange_manager.get(ctx),
+            (
+                "test_runner: first\n"
+                "bot: bar\n"
+                "\n"
+                "test_runner: second\n"
+                "bot: bar\n"
+            ),
+        )
+
+        # the second prompt was built after the first exchange was recorded
+        second_prompt = self.mocked_create.call_args_list[1].kwargs["prompt"]
+        self.assertIn("test_runner: first\nbot: bar\n", second_prompt)
+
+    async def test_flush_during_in_flight_chat(self):
+        """A flush sent while a chat is in progress isn't undone by that chat"""
+        ctx = await build_context(author="test_runner")
+
+        await asyncio.gather(
+            self.cog.chat(self.cog, ctx, "hello"),
+            self.cog.flush_chat_history(self.cog, ctx),
+        )
+        self.assertEqual(self.cog.exchange_manager.get(ctx), "")
+
+    async def test_slash_flush_replies_without_waiting(self):
+        """The slash flush acknowledges right away, even with a full chat queue"""
+        from butterfly_bot.openai_utils import conversation_key
+
+        ctx = await build_context(author="test_runner")
+        slash_ctx = await build_context(author="test_runner")
+
+        # hold the first completion until the flush has replied
+        flushed = threading.Event()
+
+        def create_after_flush(**kwargs):
+            flushed.wait(timeout=5)
+            return self.mocked_create.return_value
+
+        self.mocked_create.side_effect = create_after_flush
+
+        chats = [
+            asyncio.create_task(self.cog.chat(self.cog, ctx, f"chat {i}"))
+            for i in range(3)
+        ]
+        while self.cog.conversations.pending(conversation_key(ctx)) < 3:
+            await asyncio.sleep(0)
+
+        await self.cog.flush_chat_history_slash.func(self.cog, slash_ctx)
+        slash_ctx.send.assert_awaited_once_with(
+            "I have forgotten everything we discussed."
+        )
+        flushed.set()
+
+        await asyncio.gather(*chats)
+        self.assertEqual(self.cog.exchange_manager.get(ctx), "")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import AsyncMock
+
+from discord.ext import commands
+
+
+class HotReloadTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        os.environ["GUILD_IDS"] = "1234567890,9876543210"
+        self.bot = commands.Bot(command_prefix="!")
+        self.bot.load_extension("butterfly_bot.cogs")
+        self.addCleanup(self.bot.unload_extension, "butterfly_bot.cogs")
+
+    async def test_state_survives_reload(self):
+        from butterfly_bot.reload import hot_reload
+
+        ctx: commands.Context = AsyncMock()
+        ctx.message.channel.id = "arbitrary"
+
+        old_chat = self.bot.get_cog("OpenAIBot")
+        old_chat.exchange_manager.append(ctx, "test_runner: hello\nbot: bar\n")
+        start_time = self.bot.get_cog("UtilityBot")._start_time
+
+        self.assertEqual(await hot_reload(self.bot, "butterfly_bot.cogs"), 0)
+
+        new_chat = self.bot.get_cog("OpenAIBot")
+        self.assertIsNot(new_chat, old_chat)
+        self.assertEqual(
+            new_chat.exchange_manager.get(ctx), "test_runner: hello\nbot: bar\n"
+        )
+        self.assertEqual(self.bot.get_cog("UtilityBot")._start_time, start_time)
+        self.assertIn("chat", self.bot.all_commands)
+
+    async def test_drain_waits_for_in_flight_commands(self):
+        from butterfly_bot.reload import hot_reload
+
+        cog = self.bot.get_cog("OpenAIBot")
+        release = asyncio.Event()
+
+        async def in_flight():
+            await cog.cog_before_invoke(None)
+            await release.wait()
+            await cog.cog_after_invoke(None)
+
+        task = asyncio.create_task(in_flight())
+        await asyncio.sleep(0)
+
+        self.assertEqual(await cog.drain(timeout=0.01), 1)
+        self.assertEqual(
+            await hot_reload(self.bot, "butterfly_bot.cogs", timeout=0.01), 1
+        )
+
+        release.set()
+        await task
+        self.assertEqual(await cog.drain(timeout=0.01), 0)
+
+    async def test_unload_then_load_starts_empty(self):
+        ctx: commands.Context = AsyncMock()
+        ctx.message.channel.id = "arbitrary"
+
+        self.bot.get_cog("OpenAIBot").exchange_manager.append(ctx, "leaked\n")
+        self.bot.unload_extension("butterfly_bot.cogs")
+        self.bot.load_extension("butterfly_bot.cogs")
+
+        self.assertEqual(self.bot.get_cog("OpenAIBot").exchange_manager.get(ctx), "")
+
+
+if __name__ == "__main__":
+    unittest.main()